@@ -54,7 +54,7 @@ exports.sendMessage = async (req, res) => {
         let moderationResult = null;
 
         if (contentType === "text" && content?.trim()) {
-            moderationResult = await moderationEngine(content);
+            moderationResult = await moderationEngine(content, conversation._id, senderId);
 
             
             if (
@@ -82,11 +82,28 @@ exports.sendMessage = async (req, res) => {
             content,
             contentType,
             imageOrVideoUrl, // no-need 
-            messageStatus // no-need
+            messageStatus, // no-need
+            flaggedForReview: Boolean(moderationResult?.context_flagged)
         });
 
         await message.save();
 
+        if (moderationResult?.context_token) {
+            // best effort, don't hold up delivery
+            moderationEngine.commitContext(moderationResult.context_token);
+        }
+
+        // warn the sender when their recent messages together read as harassment
+        if (moderationResult?.context_flagged) {
+            const senderSocketId = req.socketUserMap?.get(senderId);
+            if (senderSocketId) {
+                req.io.to(senderSocketId).emit("moderation_warning", {
+                    messageId: message._id,
+                    reason: "Your recent messages in this conversation may come across as abusive."
+                });
+            }
+        }
+
         if (message?.content) {
             conversation.lastMessage = message?._id
         }
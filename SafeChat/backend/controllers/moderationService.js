@@ -1,12 +1,17 @@
 const axios = require("axios");
 
 const ML_URL = "http://localhost:8000/moderate"; // IMPORTANT change
+const ML_COMMIT_URL = `${ML_URL}/commit`;
 
-const moderationEngine = async (text) => {
+const moderationEngine = async (text, conversationId, senderId) => {
   try {
     console.log("Sending text to ML:", text);
 
-    const response = await axios.post(ML_URL, { text });
+    const payload = { text };
+    if (conversationId) payload.conversation_id = String(conversationId);
+    if (senderId) payload.sender_id = String(senderId);
+
+    const response = await axios.post(ML_URL, payload);
 
     console.log("ML RESPONSE:", response.data);
     return response.data;
@@ -19,4 +24,16 @@ const moderationEngine = async (text) => {
   }
 };
 
+// Record a delivered message in the ML conversation context (best effort)
+const commitContext = async (contextToken) => {
+  try {
+    await axios.post(ML_COMMIT_URL, { context_token: contextToken });
+  } catch (error) {
+    console.error("ML COMMIT ERROR:",
+      error.response ? error.response.data : error.message
+    );
+  }
+};
+
 module.exports = moderationEngine;
+module.exports.commitContext = commitContext;
@@ -22,6 +22,7 @@ const messageSchema = new mongoose.Schema({
         }
     ],
     messageStatus:{type: String, default: 'send'},
+    flaggedForReview: {type: Boolean, default: false}, // sender's recent messages add up to abuse
 },{timestamps:true})
 
 const Message = mongoose.model("Message",messageSchema);
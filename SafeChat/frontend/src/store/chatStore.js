@@ -4,6 +4,7 @@ import { create } from "zustand";
 import { getSocket, initializeSocket } from "../services/chat.service";
 import axiosInstance from "../services/url.service";
 import useUserStore from "./useUserStore";
+import { toast } from "react-toastify";
 
 export const useChatStore = create((set, get) => ({
     conversations: [], // list of all conversations
@@ -30,6 +31,7 @@ export const useChatStore = create((set, get) => ({
         socket.off("message_error");
         socket.off("message_deleted");
         socket.off("messages_read");
+        socket.off("moderation_warning");
 
 
         // listen for incoming message
@@ -83,6 +85,11 @@ export const useChatStore = create((set, get) => ({
             console.error("message error", error)
         });
 
+        // warn when recent messages in this chat add up to abuse
+        socket.on("moderation_warning", ({ reason }) => {
+            toast.warn(reason);
+        });
+
         // listener for typing users
         socket.on("user_typing", ({ userId, conversationId, isTyping }) => {
             set((state) => {
@@ -2,6 +2,7 @@ import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Optional
 from .engine import ModerationEngine
 import uvicorn
 import os
@@ -46,17 +47,35 @@ except Exception as e:
 
 class Message(BaseModel):
     text: str
+    conversation_id: Optional[str] = None  # enables conversation-aware moderation
+    sender_id: Optional[str] = None
+
+class ContextCommit(BaseModel):
+    context_token: str
 
 @app.get("/")
 async def health_check():
     if engine:
-        return {"status": "online", "message": "ModeratorAI is ready."}
+        return {
+            "status": "online",
+            "message": "ModeratorAI is ready.",
+            "device": engine.device.type,
+            "precision": engine.precision,
+            "precision_parity": engine.parity,
+        }
     return {"status": "error", "message": "ModeratorAI engine failed to load."}
 
 @app.post("/moderate")
 async def moderate_endpoint(msg: Message):
     return await process_moderation(msg)
 
+@app.post("/moderate/commit")
+async def commit_context_endpoint(entry: ContextCommit):
+    # Called once a moderated message has been delivered, so rejected text never enters the context
+    if not engine:
+        raise HTTPException(status_code=503, detail="Moderation engine not available")
+    return {"committed": engine.commit_context(entry.context_token)}
+
 from fastapi import Request
 
 @app.post("/api/chats/analyze-message")
@@ -75,8 +94,15 @@ async def moderate_endpoint_alias(request: Request):
         logger.error(f"Missing text field in body: {body}")
         raise HTTPException(status_code=422, detail="Missing 'text', 'message', or 'content' field in JSON")
 
+    conversation_id = body.get("conversation_id") or body.get("conversationId")
+    sender_id = body.get("sender_id") or body.get("senderId")
+
     # Create Message object manually
-    msg = Message(text=text)
+    msg = Message(
+        text=text,
+        conversation_id=str(conversation_id) if conversation_id else None,
+        sender_id=str(sender_id) if sender_id else None,
+    )
     return await process_moderation(msg)
 
 async def process_moderation(msg: Message):
@@ -85,7 +111,7 @@ async def process_moderation(msg: Message):
     
     logger.info(f"Received request: {msg.text[:50]}...")
     try:
-        result = engine.moderate(msg.text)
+        result = engine.moderate(msg.text, msg.conversation_id, msg.sender_id)
         logger.info(f"Processed request. Toxic: {result['toxic']}")
         response_data = {
             "is_flagged": result["toxic"],
@@ -96,6 +122,9 @@ async def process_moderation(msg: Message):
             "level": result["severity"],
             "suggested_alternative": result["suggestion"],
             "suggestion": result["suggestion"],
+            "context_flagged": result["context_toxic"],
+            "context_score": result["context_score"],
+            "context_token": result["context_token"],
             "original_text": msg.text
         }
         logger.info(f"DEBUG: Sending response: {response_data}")
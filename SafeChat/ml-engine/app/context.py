@@ -0,0 +1,59 @@
+from collections import OrderedDict, deque
+import threading
+import time
+
+
+class ConversationCache:
+    """Bounded LRU/TTL store of the most recent values per key, e.g. per (conversation ID, sender).
+
+    Kept free of torch so it can be reused for any per-message payload.
+    """
+
+    def __init__(self, window=8, ttl=1800, max_conversations=100_000):
+        self.window = window
+        self.ttl = ttl
+        self.max_conversations = max_conversations
+        self._store = OrderedDict()  # key -> [last_seen, deque of values], least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None:
+                return []
+            if now - entry[0] > self.ttl:
+                del self._store[key]
+                return []
+            entry[0] = now
+            self._store.move_to_end(key)
+            return list(entry[1])
+
+    def append(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._store.pop(key, None)
+            values = entry[1] if entry else deque(maxlen=self.window)
+            values.append(value)
+            self._store[key] = [now, values]
+            self._evict(now)
+
+    def pop(self, key):
+        """Remove the values for `key` and return them, or [] if absent or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._store.pop(key, None)
+            if entry is None or now - entry[0] > self.ttl:
+                return []
+            return list(entry[1])
+
+    def _evict(self, now):
+        # get/append refresh last_seen and move the key to the back, so the front is always the oldest
+        while self._store:
+            oldest_key, (last_seen, _) = next(iter(self._store.items()))
+            if len(self._store) <= self.max_conversations and now - last_seen <= self.ttl:
+                break
+            del self._store[oldest_key]
+
+    def __len__(self):
+        return len(self._store)
@@ -3,8 +3,13 @@ import torch.nn as nn
 from transformers import AutoTokenizer, AutoModel, AutoModelForSeq2SeqLM
 from peft import PeftModel
 from langdetect import detect
+from contextlib import nullcontext
+import uuid
 import os
 
+from .context import ConversationCache
+from .precision import PRECISION_DTYPES, select_precision
+
 
 # --- MODEL ARCHITECTURES ---
 
@@ -48,13 +53,30 @@ class MetaNet(nn.Module):
         return out[:, 0:1], out[:, 1:7], out[:, 7:11]
 
 
+# --- CONVERSATION CONTEXT ---
+
+# Each model contributes 11 features: toxicity + 6 category probabilities, then a 4-way severity softmax
+CONTEXT_PROB_DIMS = torch.tensor(([True] * 7 + [False] * 4) * 3)
+
+
 # --- THE FIXED ENGINE ---
 
 class ModerationEngine:
-    def __init__(self):
+    # Weight of each older message relative to the one after it when pooling context
+    CONTEXT_DECAY = 0.7
+    # MetaNet toxicity probability on the pooled context above which the sender is flagged
+    CONTEXT_THRESHOLD = 0.5
+
+    def __init__(self, context_window=8, context_ttl=1800, max_conversations=100_000):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         print(f"🚀 Initializing Moderation Engine on {self.device}...")
 
+        self.context = ConversationCache(context_window, context_ttl, max_conversations)
+        # Features of analysed messages wait here, keyed by context token, until the caller confirms delivery
+        self.pending_context = ConversationCache(1, context_ttl, max_conversations)
+        self.precision = select_precision(self.device)
+        print(f"Precision policy: {self.precision}")
+
         # 1. LOAD CLASSIFIERS
         # Helper to load tokenizer safely
         def load_tokenizer(name, local_path=None):
@@ -78,7 +100,7 @@ class ModerationEngine:
         self.muril = self._load_mtl_model("google/muril-base-cased", muril_path)
 
         # BiLSTM
-        self.bilstm = BiLSTMMTL(len(self.tok_xlmr)).to(self.device).half().eval()
+        self.bilstm = BiLSTMMTL(len(self.tok_xlmr)).to(self.device).eval()
         if os.path.exists(bilstm_path):
             self.bilstm.load_state_dict(torch.load(bilstm_path, map_location=self.device))
         else:
@@ -91,6 +113,8 @@ class ModerationEngine:
         else:
              print(f"⚠️ Warning: MetaNet weights not found at {meta_path}")
 
+        self.parity = self._check_precision_parity()
+
         # 2. FIXED REWRITER LOADING (CRITICAL FIX)
         print("📦 Synchronizing mBART-50 Adapters...")
         base_model_name = os.path.join(base_path, "models", "final_detox_mbart")
@@ -136,27 +160,112 @@ class ModerationEngine:
             # Return a basic version so code doesn't crash, or raise
             return TransformerMTL(base).to(self.device).eval()
 
-    def moderate(self, text):
-        if not text.strip(): return {"toxic": False, "severity": 0, "suggestion": ""}
+    def _autocast(self, name):
+        # Weights stay fp32; reduced precision is applied per forward pass via autocast
+        dtype = PRECISION_DTYPES[self.precision[name]]
+        if dtype == torch.float32:
+            return nullcontext()
+        return torch.autocast(device_type=self.device.type, dtype=dtype)
+
+    def _get_scores(self, name, txt):
+        m = getattr(self, name)
+        t = self.tok_muril if name == "muril" else self.tok_xlmr
+        inputs = t(txt, return_tensors="pt", padding=True, truncation=True).to(self.device)
+        with self._autocast(name):
+            if isinstance(m, BiLSTMMTL):
+                s, c, v = m(inputs['input_ids'])
+            else:
+                s, c, v = m(inputs['input_ids'], inputs['attention_mask'])
+        s, c, v = s.float(), c.float(), v.float()
+        return torch.cat([torch.sigmoid(s), torch.sigmoid(c), torch.softmax(v, dim=1)], dim=1)
+
+    # Toxic and benign, English and Hindi, so the parity check covers both ends of each head
+    PARITY_PROBES = [
+        "You are such an idiot, nobody wants you here.",
+        "Thanks for your help yesterday, see you at the meeting.",
+        "तुम बहुत बेवकूफ हो, यहाँ से निकल जाओ।",
+        "आपकी मदद के लिए धन्यवाद, कल मिलते हैं।",
+    ]
 
+    def _check_precision_parity(self, tolerance=0.02):
+        """Compare reduced-precision scores against fp32 on PARITY_PROBES.
+
+        Any model whose scores drift more than `tolerance` on any probe is reverted to fp32.
+        """
+        report = {}
         with torch.no_grad():
-            # Classifier predictions
-            def get_scores(m, t, txt):
-                inputs = t(txt, return_tensors="pt", padding=True, truncation=True).to(self.device)
-                if isinstance(m, BiLSTMMTL):
-                    s, c, v = m(inputs['input_ids'])
+            for name, mode in self.precision.items():
+                if mode == "fp32" or name == "meta":
+                    continue
+                fast = [self._get_scores(name, probe) for probe in self.PARITY_PROBES]
+                self.precision[name] = "fp32"
+                ref = [self._get_scores(name, probe) for probe in self.PARITY_PROBES]
+                diff = max((f - r).abs().max().item() for f, r in zip(fast, ref))
+                ok = diff <= tolerance
+                if ok:
+                    self.precision[name] = mode
                 else:
-                    s, c, v = m(inputs['input_ids'], inputs['attention_mask'])
-                return torch.cat([torch.sigmoid(s), torch.sigmoid(c), torch.softmax(v, dim=1)], dim=1).float()
+                    print(f"⚠️ Warning: {name} {mode} drifted {diff:.4f} from fp32, falling back to fp32")
+                report[name] = {"precision": mode, "max_abs_diff": round(diff, 6), "passed": ok}
+        return report
+
+    def _blend_context(self, feats, history):
+        """Pool the new message's classifier features with the sender's cached ones.
+
+        Toxicity and category probabilities are combined with a decayed noisy-OR, so
+        evidence from several individually mild messages adds up instead of averaging
+        out. Severity distributions must stay normalised and use a decayed mean.
+        """
+        past = torch.stack(history).to(feats.device)
+        n = past.size(0)
+        weights = (self.CONTEXT_DECAY ** torch.arange(n, 0, -1, dtype=feats.dtype)).to(feats.device)
+        weighted = weights[:, None] * past
+        noisy_or = 1 - (1 - feats) * torch.prod(1 - weighted, dim=0)
+        mean = (feats + weighted.sum(dim=0)) / (1 + weights.sum())
+        return torch.where(CONTEXT_PROB_DIMS.to(feats.device), noisy_or, mean)
+
+    def commit_context(self, context_token):
+        """Add the message analysed under `context_token` to its sender's history.
+
+        Call this only once the message has actually been delivered.
+        """
+        pending = self.pending_context.pop(context_token)
+        if not pending:
+            return False
+        key, feats = pending[-1]
+        self.context.append(key, feats)
+        return True
 
-            f1 = get_scores(self.xlmr, self.tok_xlmr, text)
-            f2 = get_scores(self.muril, self.tok_muril, text)
-            f3 = get_scores(self.bilstm, self.tok_xlmr, text)
+    def moderate(self, text, conversation_id=None, sender_id=None):
+        if not text.strip():
+            return {"toxic": False, "severity": 0, "suggestion": "", "context_toxic": False,
+                    "context_score": 0.0, "context_token": None}
+
+        key = (conversation_id, sender_id)
+        with torch.no_grad():
+            # Classifier predictions
+            f1 = self._get_scores("xlmr", text)
+            f2 = self._get_scores("muril", text)
+            f3 = self._get_scores("bilstm", text)
+            feats = torch.cat([f1, f2, f3], dim=1)
+
+            # Score the message alone and, if the sender has history here, the pooled context
+            history = self.context.get(key) if conversation_id is not None else []
+            meta_in = feats if not history else torch.cat([feats, self._blend_context(feats, history)], dim=0)
 
             # Meta-Decision
-            s_l, c_l, v_l = self.meta(torch.cat([f1, f2, f3], dim=1))
-            is_toxic = torch.sigmoid(s_l).item() > 0.5
-            severity = torch.argmax(v_l, dim=1).item()
+            s_l, c_l, v_l = self.meta(meta_in)
+            toxicity = torch.sigmoid(s_l[:, 0]).tolist()
+            is_toxic = toxicity[0] > 0.5
+            severity = torch.argmax(v_l[0]).item()
+
+        # Conversation context is a separate signal and never changes the message's own verdict
+        context_score = toxicity[1] if history else 0.0
+        context_toxic = context_score > self.CONTEXT_THRESHOLD
+        context_token = None
+        if conversation_id is not None:
+            context_token = uuid.uuid4().hex
+            self.pending_context.append(context_token, (key, feats[0].detach().float().cpu()))
 
         # 3. FIXED GENERATION LOGIC (DETOXIFICATION)
         suggestion = text
@@ -182,4 +291,11 @@ class ModerationEngine:
             )
             suggestion = self.rewriter_tok.decode(gen_tokens[0], skip_special_tokens=True)
 
-        return {"toxic": is_toxic, "severity": severity, "suggestion": suggestion}
\ No newline at end of file
+        return {
+            "toxic": is_toxic,
+            "severity": severity,
+            "suggestion": suggestion,
+            "context_toxic": context_toxic,
+            "context_score": context_score,
+            "context_token": context_token,
+        }
@@ -0,0 +1,56 @@
+import torch
+import os
+
+
+PRECISION_DTYPES = {"fp32": torch.float32, "bf16": torch.bfloat16, "fp16": torch.float16}
+
+
+def _cpuinfo_flags():
+    try:
+        with open("/proc/cpuinfo") as f:
+            return set(f.read().split())
+    except OSError:
+        return set()
+
+
+def cpu_supports_bf16():
+    """True when the CPU has native bf16 support (AVX512-BF16 or AMX).
+
+    Plain AVX512 only emulates bf16, which is usually slower than fp32, so it does not count.
+    """
+    checks = [getattr(torch.cpu, name, None) for name in ("_is_avx512_bf16_supported", "_is_amx_tile_supported")]
+    checks = [check for check in checks if check is not None]
+    if checks:
+        return any(check() for check in checks)
+    # Older torch builds lack these checks; fall back to the Linux CPU flags
+    flags = _cpuinfo_flags()
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def select_precision(device):
+    """Pick a precision for each model from the device's capabilities.
+
+    The transformers were trained under fp16 autocast, so they get fp16 on CUDA and
+    bf16 autocast on CPUs that can run it natively. The BiLSTM ran its LSTM in fp32
+    outside autocast during training, and the MetaNet is too small to benefit, so
+    both stay fp32. SAFECHAT_PRECISION (auto, fp32, bf16 or fp16) overrides the
+    transformer precision; forced modes are still subject to the parity check.
+    fp16 is rejected on CPU, where autocast does not reliably run it.
+    """
+    requested = os.environ.get("SAFECHAT_PRECISION", "auto").strip().lower() or "auto"
+    if requested != "auto" and requested not in PRECISION_DTYPES:
+        raise ValueError(
+            f"SAFECHAT_PRECISION must be one of auto, {', '.join(PRECISION_DTYPES)}; got {requested!r}"
+        )
+    if requested == "fp16" and device.type != "cuda":
+        raise ValueError("SAFECHAT_PRECISION=fp16 is only supported on CUDA")
+
+    if requested != "auto":
+        fast = requested
+    elif device.type == "cuda":
+        fast = "fp16"
+    elif cpu_supports_bf16():
+        fast = "bf16"
+    else:
+        fast = "fp32"
+    return {"xlmr": fast, "muril": fast, "bilstm": "fp32", "meta": "fp32"}
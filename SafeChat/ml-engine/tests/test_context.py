@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import context as context_mod
+from app.context import ConversationCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(context_mod.time, "monotonic", fake)
+    return fake
+
+
+def test_cache_evicts_least_recently_used(clock):
+    cache = ConversationCache(max_conversations=2)
+    cache.append("a", 0.1)
+    clock.now = 1
+    cache.append("b", 0.2)
+    clock.now = 2
+    cache.get("a")
+    clock.now = 3
+    cache.append("c", 0.3)
+    assert len(cache) == 2
+    assert cache.get("b") == []
+    assert cache.get("a") == [0.1]
+
+
+def test_cache_expires_after_ttl(clock):
+    cache = ConversationCache(ttl=10)
+    cache.append("a", 0.1)
+    clock.now = 5
+    assert cache.get("a") == [0.1]
+    clock.now = 16
+    assert cache.get("a") == []
+    assert len(cache) == 0
+
+
+def test_cache_get_refreshes_ttl(clock):
+    cache = ConversationCache(ttl=10)
+    cache.append("a", 0.1)
+    clock.now = 8
+    cache.get("a")
+    clock.now = 16
+    cache.append("b", 0.2)
+    assert cache.get("a") == [0.1]
+
+
+def test_cache_keeps_only_window(clock):
+    cache = ConversationCache(window=3)
+    for value in [0.1, 0.2, 0.3, 0.4, 0.5]:
+        cache.append("a", value)
+    assert cache.get("a") == [0.3, 0.4, 0.5]
+
+
+def test_cache_pop_removes_entry(clock):
+    cache = ConversationCache(ttl=10)
+    cache.append("a", 0.1)
+    assert cache.pop("a") == [0.1]
+    assert cache.pop("a") == []
+    cache.append("b", 0.2)
+    clock.now = 11
+    assert cache.pop("b") == []
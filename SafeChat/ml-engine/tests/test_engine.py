@@ -0,0 +1,144 @@
+import os
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("peft")
+pytest.importorskip("langdetect")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.context import ConversationCache
+from app.engine import ModerationEngine
+
+
+def scores(toxicity):
+    """Classifier output for one model: toxicity, 6 categories, uniform severity."""
+    return torch.tensor([[toxicity] + [0.1] * 6 + [0.25] * 4])
+
+
+class StubMeta:
+    """Stands in for MetaNet: scores each row by its first (XLM-R toxicity) feature, severity 2."""
+
+    def __init__(self):
+        self.inputs = []
+
+    def __call__(self, x):
+        self.inputs.append(x)
+        p = x[:, :1].clamp(1e-6, 1 - 1e-6)
+        severity = torch.tensor([[0.0, 0.0, 1.0, 0.0]]).repeat(x.size(0), 1)
+        return torch.log(p / (1 - p)), torch.zeros(x.size(0), 6), severity
+
+
+def make_engine(toxicity):
+    eng = ModerationEngine.__new__(ModerationEngine)
+    eng.device = torch.device("cpu")
+    eng.context = ConversationCache()
+    eng.pending_context = ConversationCache(1)
+    eng.meta = StubMeta()
+    eng.toxicity = toxicity
+    eng._get_scores = lambda name, txt: scores(eng.toxicity)
+    return eng
+
+
+def test_blend_context_pools_probabilities_and_severity():
+    eng = make_engine(0.3)
+    d = ModerationEngine.CONTEXT_DECAY
+    feats = torch.cat([scores(0.3)] * 3, dim=1)
+    history = [torch.cat([scores(0.2)] * 3, dim=1)[0], torch.cat([scores(0.4)] * 3, dim=1)[0]]
+    pooled = eng._blend_context(feats, history)
+
+    assert pooled.shape == (1, 33)
+    expected = 1 - (1 - 0.3) * (1 - d * 0.4) * (1 - d * d * 0.2)
+    assert pooled[0, 0].item() == pytest.approx(expected)
+    assert pooled[0, 11].item() == pytest.approx(expected)
+    # Severity stays a distribution
+    assert pooled[0, 7:11].sum().item() == pytest.approx(1.0)
+
+
+def test_moderate_without_conversation_matches_single_message():
+    eng = make_engine(0.1)
+    result = eng.moderate("hello there")
+    assert result == {
+        "toxic": False,
+        "severity": 2,
+        "suggestion": "hello there",
+        "context_toxic": False,
+        "context_score": 0.0,
+        "context_token": None,
+    }
+    assert eng.meta.inputs[0].shape == (1, 33)
+    assert len(eng.context) == 0 and len(eng.pending_context) == 0
+
+
+def test_context_builds_up_over_mild_messages():
+    eng = make_engine(0.3)
+    flags = []
+    for _ in range(3):
+        result = eng.moderate("mild", "conv", "alice")
+        assert not result["toxic"]
+        flags.append(result["context_toxic"])
+        eng.commit_context(result["context_token"])
+    assert flags == [False, False, True]
+
+
+def test_context_is_per_sender():
+    eng = make_engine(0.3)
+    for _ in range(3):
+        eng.commit_context(eng.moderate("mild", "conv", "alice")["context_token"])
+    eng.toxicity = 0.05
+    result = eng.moderate("hi", "conv", "bob")
+    assert result["context_score"] == 0.0
+    assert not result["context_toxic"] and not result["toxic"]
+
+
+def test_only_committed_messages_enter_context():
+    eng = make_engine(0.3)
+    first = eng.moderate("mild", "conv", "alice")["context_token"]
+    eng.toxicity = 0.9
+    second = eng.moderate("blocked", "conv", "alice")["context_token"]
+    assert eng.context.get(("conv", "alice")) == []
+
+    # Committing the first in-flight message stores its own features, not the second's
+    assert eng.commit_context(first)
+    history = eng.context.get(("conv", "alice"))
+    assert len(history) == 1 and history[0][0].item() == pytest.approx(0.3)
+    assert not eng.commit_context(first)
+    assert second != first
+
+
+def make_parity_engine(drift):
+    """Engine whose reduced-precision scores differ from fp32 by drift[name]."""
+    eng = ModerationEngine.__new__(ModerationEngine)
+    eng.device = torch.device("cpu")
+    eng.precision = {"xlmr": "bf16", "muril": "bf16", "bilstm": "fp32", "meta": "fp32"}
+    ref = torch.full((1, 11), 0.5)
+
+    def get_scores(name, txt):
+        if eng.precision[name] == "fp32":
+            return ref
+        return ref + drift[name]
+
+    eng._get_scores = get_scores
+    return eng
+
+
+def test_parity_keeps_close_models_and_reverts_drifting_ones():
+    eng = make_parity_engine({"xlmr": 0.001, "muril": 0.1})
+    report = eng._check_precision_parity(tolerance=0.02)
+
+    assert eng.precision == {"xlmr": "bf16", "muril": "fp32", "bilstm": "fp32", "meta": "fp32"}
+    assert report["xlmr"]["passed"] and not report["muril"]["passed"]
+    assert report["muril"]["max_abs_diff"] == pytest.approx(0.1)
+    assert set(report) == {"xlmr", "muril"}
+
+
+def test_parity_checks_every_probe():
+    eng = make_parity_engine({"xlmr": 0.0, "muril": 0.0})
+    seen = []
+    get_scores = eng._get_scores
+    eng._get_scores = lambda name, txt: seen.append(txt) or get_scores(name, txt)
+    eng._check_precision_parity()
+    assert set(seen) == set(ModerationEngine.PARITY_PROBES)
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import precision as precision_mod
+from app.precision import cpu_supports_bf16, select_precision
+
+CPU = torch.device("cpu")
+CUDA = torch.device("cuda")
+
+
+@pytest.fixture(autouse=True)
+def no_override(monkeypatch):
+    monkeypatch.delenv("SAFECHAT_PRECISION", raising=False)
+
+
+def fake_host(monkeypatch, avx512_bf16=None, amx=None, flags=()):
+    """Stub torch's CPU checks (None removes them, as on older torch) and /proc/cpuinfo."""
+    for name, value in (("_is_avx512_bf16_supported", avx512_bf16), ("_is_amx_tile_supported", amx)):
+        if value is None:
+            monkeypatch.delattr(torch.cpu, name, raising=False)
+        else:
+            monkeypatch.setattr(torch.cpu, name, lambda value=value: value, raising=False)
+    monkeypatch.setattr(precision_mod, "_cpuinfo_flags", lambda: set(flags))
+
+
+def test_avx512_without_bf16_is_not_enough(monkeypatch):
+    fake_host(monkeypatch, avx512_bf16=False, amx=False, flags={"avx512f", "avx512bw", "avx512vl", "avx512dq"})
+    assert not cpu_supports_bf16()
+    assert select_precision(CPU)["xlmr"] == "fp32"
+
+
+@pytest.mark.parametrize("avx512_bf16, amx", [(True, False), (False, True)])
+def test_torch_checks_detect_bf16(monkeypatch, avx512_bf16, amx):
+    fake_host(monkeypatch, avx512_bf16=avx512_bf16, amx=amx)
+    assert cpu_supports_bf16()
+
+
+@pytest.mark.parametrize("flags, expected", [
+    ({"avx512f", "avx512bw", "avx512vl"}, False),
+    ({"avx512f", "avx512_bf16"}, True),
+    ({"amx_bf16", "amx_tile"}, True),
+])
+def test_cpuinfo_fallback(monkeypatch, flags, expected):
+    fake_host(monkeypatch, flags=flags)
+    assert cpu_supports_bf16() is expected
+
+
+def test_cuda_uses_fp16_for_transformers_only():
+    assert select_precision(CUDA) == {"xlmr": "fp16", "muril": "fp16", "bilstm": "fp32", "meta": "fp32"}
+
+
+@pytest.mark.parametrize("has_bf16, expected", [(True, "bf16"), (False, "fp32")])
+def test_cpu_uses_bf16_only_when_supported(monkeypatch, has_bf16, expected):
+    monkeypatch.setattr(precision_mod, "cpu_supports_bf16", lambda: has_bf16)
+    policy = select_precision(CPU)
+    assert policy["xlmr"] == policy["muril"] == expected
+    assert policy["bilstm"] == policy["meta"] == "fp32"
+
+
+@pytest.mark.parametrize("value, expected", [("fp32", "fp32"), ("BF16", "bf16"), ("fp16", "fp16"), ("auto", "fp16")])
+def test_env_override(monkeypatch, value, expected):
+    monkeypatch.setenv("SAFECHAT_PRECISION", value)
+    assert select_precision(CUDA)["xlmr"] == expected
+
+
+@pytest.mark.parametrize("value, device", [("int8", CPU), ("fp16", CPU)])
+def test_env_override_rejects_unsupported_value(monkeypatch, value, device):
+    monkeypatch.setenv("SAFECHAT_PRECISION", value)
+    with pytest.raises(ValueError):
+        select_precision(device)